@@ -1,8 +1,40 @@
 import yfinance as yf
+from curl_cffi import requests
 import pandas as pd
 from pprint import pprint
 
-data = yf.download('AAPL', start='2020-07-31', end='2025-07-31')
+from csv_utils import write_csv
 
-df = data.to_csv('./dataset/stock_price.csv')
+TICKERS = ['AAPL']
+START_DATE = '2020-07-31'
+END_DATE = '2025-07-31'
+
+# Yahoo serves at most 20 symbols per multi-ticker request
+BATCH_SIZE = 20
+
+# Reuse one keep-alive session across all batches
+session = requests.Session(impersonate="chrome")
+
+batches = []
+for i in range(0, len(TICKERS), BATCH_SIZE):
+    batch = yf.download(
+        tickers=TICKERS[i:i + BATCH_SIZE],
+        start=START_DATE,
+        end=END_DATE,
+        group_by='ticker',
+        threads=True,
+        auto_adjust=False,
+        session=session
+    )
+    batches.append(batch)
+
+data = pd.concat(batches, axis=1)
+
+# Flatten (Ticker, Price) columns, e.g. AAPL_Close
+data.columns = ['_'.join(col).strip() for col in data.columns]
+
+# Plain dates, so Arrow writes 2020-07-31 rather than a full nanosecond timestamp
+data.index = pd.Index(data.index.date, name='Date')
+
+write_csv(data.reset_index(), './dataset/stock_price.csv')
 print('Done')
@@ -0,0 +1,69 @@
+import pickle
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable
+
+CACHE_DIR = Path(".cache")
+
+
+class FileCache:
+    """On-disk cache for yfinance responses, stored as .cache/<ticker>/<endpoint>.pkl"""
+
+    def __init__(self, cache_dir: Path = CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+
+    def _path(self, ticker: str, endpoint: str) -> Path:
+        return self.cache_dir / ticker.upper() / f"{endpoint}.pkl"
+
+    def get(self, ticker: str, endpoint: str, ttl: float) -> Any:
+        path = self._path(ticker, endpoint)
+        try:
+            # A rewritten entry gets a new mtime, so the memo never serves stale data
+            saved_at, value = _load_entry(path, path.stat().st_mtime)
+        except Exception:
+            # Any unreadable entry (including pickles from an older pandas or
+            # yfinance) is a miss, so get_or_fetch refetches and rewrites it
+            return None
+
+        # Expired entries are treated as missing
+        if time.time() - saved_at > ttl:
+            return None
+        return value
+
+    def set(self, ticker: str, endpoint: str, value: Any) -> None:
+        path = self._path(ticker, endpoint)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temp file first so a crash never leaves a half-written entry
+        tmp_path = path.with_suffix(".tmp")
+        with tmp_path.open("wb") as f:
+            pickle.dump((time.time(), value), f)
+        tmp_path.replace(path)
+
+    def get_or_fetch(self, ticker: str, endpoint: str, ttl: float, fetch: Callable[[], Any]) -> Any:
+        value = self.get(ticker, endpoint, ttl)
+        if value is None:
+            value = fetch()
+            # Don't cache empty responses, so the next run retries them
+            if value is not None and not _is_empty(value):
+                self.set(ticker, endpoint, value)
+        return value
+
+
+# Bounded since each statement frame can be a few MB. Failed loads raise,
+# and lru_cache doesn't cache exceptions, so misses are never memoized
+@lru_cache(maxsize=128)
+def _load_entry(path: Path, mtime: float) -> tuple[float, Any]:
+    with path.open("rb") as f:
+        return pickle.load(f)
+
+
+def _is_empty(value: Any) -> bool:
+    empty = getattr(value, "empty", None)
+    if isinstance(empty, bool):
+        return empty
+    try:
+        return len(value) == 0
+    except TypeError:
+        return False
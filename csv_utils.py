@@ -0,0 +1,59 @@
+import csv
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import csv as pacsv
+
+# Characters that force a CSV cell to be quoted
+_NEEDS_QUOTES = r'[,"\r\n]'
+
+# Largest magnitude a float64 holds exactly as an integer
+_MAX_EXACT_INT = 2 ** 53
+
+
+def write_csv(df: pd.DataFrame, path) -> None:
+    # PyArrow's C++ writer instead of pandas' Python-level formatter
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    # Arrow prints whole-number floats like 134836000000.0 as 1.34836e+11
+    table = pa.table(
+        [_integral_to_int(col) for col in table.columns],
+        names=table.column_names
+    )
+
+    # Arrow's "needed" style quotes every string cell, so only use it when some cell requires quotes
+    quoting = "needed" if _needs_quoting(table) else "none"
+
+    with Path(path).open("w", newline="") as f:
+        # Arrow always quotes the header, so write it like pandas does
+        csv.writer(f, lineterminator="\n").writerow(table.column_names)
+        f.flush()
+        pacsv.write_csv(
+            table,
+            f.buffer,
+            write_options=pacsv.WriteOptions(include_header=False, quoting_style=quoting)
+        )
+
+
+def _integral_to_int(col: pa.ChunkedArray) -> pa.ChunkedArray:
+    if not pa.types.is_floating(col.type) or col.null_count == len(col):
+        return col
+
+    finite = pc.all(pc.is_finite(col)).as_py()
+    in_range = finite and pc.max(pc.abs(col)).as_py() < _MAX_EXACT_INT
+    if in_range and pc.all(pc.equal(col, pc.floor(col))).as_py():
+        return col.cast(pa.int64())
+    return col
+
+
+def _needs_quoting(table: pa.Table) -> bool:
+    for col in table.columns:
+        if pa.types.is_dictionary(col.type):
+            col = col.cast(col.type.value_type)
+        if not (pa.types.is_string(col.type) or pa.types.is_large_string(col.type)):
+            continue
+        if pc.any(pc.match_substring_regex(col, _NEEDS_QUOTES)).as_py():
+            return True
+    return False
@@ -1,10 +1,34 @@
 import pandas as pd
 import yfinance as yf
+from curl_cffi import requests
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 import sys
 
+from cache import FileCache
+from csv_utils import write_csv
+
 MAX_TICKERS = 10
 
+# Concurrent Yahoo requests, independent of how many tickers the user enters
+MAX_WORKERS = 10
+
+# Generated by update_tickers.py, lets us validate most tickers without a request
+VALID_TICKERS_FILE = Path("dataset/valid_tickers.csv")
+
+# Financial statements only change quarterly, market data moves constantly
+FINANCIALS_TTL = 7 * 24 * 60 * 60
+INFO_TTL = 60 * 60
+
+cache = FileCache()
+
+# One keep-alive session for every Yahoo request, so connections are reused
+session = requests.Session(impersonate="chrome")
+
+# One yf.Ticker per symbol, shared by validation and extraction
+_ticker_cache: dict[str, yf.Ticker] = {}
+
 # 1) Define your metrics
 financial_metrics = [
     "Total Revenue",
@@ -31,6 +55,11 @@ cashflow_metrics = [
     "Capital Expenditure"
 ]
 
+# Built once, get_std_values reindexes against these
+FIN_IDX = pd.Index(financial_metrics)
+BAL_IDX = pd.Index(balance_metrics)
+CF_IDX = pd.Index(cashflow_metrics)
+
 market_metrics = [
     'currentPrice',
     'sharesOutstanding',
@@ -38,23 +67,41 @@ market_metrics = [
     'enterpriseValue'
 ]
 
-def get_std_values(df, metrics) -> pd.DataFrame:
-    available_metrics = df.index.intersection(metrics)
-    df_slice = df.loc[available_metrics].copy()
-    df_slice.index.name = "Metrics"
-    df_slice = df_slice.reset_index()
-    df_slice.columns = [
-        col
-        if col in ("Metrics", "TTM")
-        else pd.to_datetime(col).date().isoformat()
-        for col in df_slice.columns
-    ]
+def fetch_endpoint(t: "yf.Ticker", endpoint: str, ttl: float):
+    # Returned objects may be shared between calls, callers must not mutate them
+    return cache.get_or_fetch(t.ticker, endpoint, ttl, lambda: getattr(t, endpoint))
+
+def _insert_ttm(frame: pd.DataFrame, ttm_values: dict) -> None:
+    # Aligned on the metric index, so TTM lands right after Metrics on reset_index
+    ttm = pd.Series(ttm_values, dtype="float64").reindex(frame.index)
+    frame.insert(0, "TTM", ttm.to_numpy())
+
+def get_std_values(df, metrics: pd.Index, ttm_values: dict = None) -> pd.DataFrame:
+    # Align to the fixed schema in one pass
+    df_slice = df.reindex(metrics)
+    if ttm_values is not None:
+        _insert_ttm(df_slice, ttm_values)
+
+    # Drop metrics this ticker doesn't report. Done after TTM is added, so a
+    # metric with only a TTM value is kept
+    df_slice = df_slice.dropna(how="all")
+    # rename_axis so the shared index objects above are never renamed in place
+    df_slice = df_slice.rename_axis("Metrics").reset_index()
+
+    # Same categories for every ticker, so combined frames keep integer codes
+    df_slice["Metrics"] = df_slice["Metrics"].astype(pd.CategoricalDtype(metrics))
+
+    # Convert all date headers in one vectorized call
+    cols = df_slice.columns.to_series()
+    mask = ~cols.isin(("Metrics", "TTM"))
+    cols[mask] = pd.to_datetime(cols[mask]).dt.strftime("%Y-%m-%d")
+    df_slice.columns = cols.values
     return df_slice
 
 def extract_financial(fin: "yf.Ticker") -> pd.DataFrame:
     # 1) Pull tables
-    df_std = fin.financials
-    df_ttm = fin.ttm_financials
+    df_std = fetch_endpoint(fin, "financials", FINANCIALS_TTL)
+    df_ttm = fetch_endpoint(fin, "ttm_financials", FINANCIALS_TTL)
 
     # 2) Validate
     if df_std is None or df_std.empty:
@@ -69,36 +116,29 @@ def extract_financial(fin: "yf.Ticker") -> pd.DataFrame:
         for m in financial_metrics
         if m in df_ttm.index
     }
-    df_ttm_slice = (
-        pd.DataFrame.from_dict(ttm_values, orient="index", columns=["TTM"])
-          .rename_axis("Metrics")
-          .reset_index()
-    )
-
-    df_std = get_std_values(df_std, financial_metrics)
 
-    financial_values = pd.merge(df_ttm_slice, df_std, on="Metrics", how="outer")
+    financial_values = get_std_values(df_std, FIN_IDX, ttm_values)
 
     # print(f'Extracted financial values:\n{financial_values}')
     return financial_values
 
 def extract_balance(bs: "yf.Ticker") -> pd.DataFrame:
     # 1) Pull tables
-    df_std = bs.balance_sheet
+    df_std = fetch_endpoint(bs, "balance_sheet", FINANCIALS_TTL)
 
     # 2) Validate
     if df_std is None or df_std.empty:
         raise ValueError("No annual/quarterly balance sheet data available.")
 
-    balance_values = get_std_values(df_std, balance_metrics)
+    balance_values = get_std_values(df_std, BAL_IDX)
     
     # print(f'Extracted balance values:\n{balance_values}')
     return balance_values
 
 def extract_cashflow(cf: "yf.Ticker") -> pd.DataFrame:
     # 1) Pull tables
-    df_std = cf.cashflow
-    df_ttm = cf.ttm_cashflow
+    df_std = fetch_endpoint(cf, "cashflow", FINANCIALS_TTL)
+    df_ttm = fetch_endpoint(cf, "ttm_cashflow", FINANCIALS_TTL)
     
     # 2) Validate
     if df_std is None or df_std.empty:
@@ -112,22 +152,16 @@ def extract_cashflow(cf: "yf.Ticker") -> pd.DataFrame:
         m: df_ttm.at[m, latest_col]
         for m in cashflow_metrics
         if m in df_ttm.index
-    }   
-    df_ttm_slice = (
-        pd.DataFrame.from_dict(ttm_values, orient="index", columns=["TTM"])
-          .rename_axis("Metrics")
-          .reset_index()
-    )
-    
-    df_std = get_std_values(df_std, cashflow_metrics)
+    }
 
-    cashflow_values = pd.merge(df_ttm_slice, df_std, on="Metrics", how="outer")
+    cashflow_values = get_std_values(df_std, CF_IDX, ttm_values)
     
     return cashflow_values
 
 def extract_market(market: "yf.Ticker") -> pd.DataFrame:
     # 1) Pull market data
-    info = market.info
+    # Usually already cached by is_valid_ticker
+    info = fetch_endpoint(market, "info", INFO_TTL)
 
     # 2) Validate
     if not info:
@@ -140,16 +174,84 @@ def extract_market(market: "yf.Ticker") -> pd.DataFrame:
         'enterpriseValue': info.get('enterpriseValue', None)
     }
 
-    df_market = pd.DataFrame.from_dict(market_values, orient='index', columns=['Value'])
-    df_market.index.name = "Metrics"
-    df_market.reset_index(inplace=True)
+    df_market = pd.DataFrame({
+        'Metrics': list(market_values),
+        'Value': list(market_values.values())
+    })
 
     return df_market
 
-# Ticker is validated by having a regular market price
+def process_ticker(stock: str, ticker_obj: "yf.Ticker") -> dict[str, pd.DataFrame]:
+    # Define file paths
+    files = {
+        "financials": Path(f"dataset/{stock}_financials.csv"),
+        "balance": Path(f"dataset/{stock}_balance_sheet.csv"),
+        "cashflow": Path(f"dataset/{stock}_cashflow.csv"),
+        "market": Path(f"dataset/{stock}_market.csv"),
+    }
+
+    extractors = {
+        "financials": extract_financial,
+        "balance": extract_balance,
+        "cashflow": extract_cashflow,
+        "market": extract_market,
+    }
+
+    # Statement schemas, so frames read back from disk match freshly extracted ones
+    schemas = {
+        "financials": FIN_IDX,
+        "balance": BAL_IDX,
+        "cashflow": CF_IDX,
+    }
+
+    # Only fetch statements whose file is missing, reuse the rest
+    frames = {}
+    fetched = False
+    for name, path in files.items():
+        if path.exists():
+            df = pd.read_csv(path)
+            if name in schemas:
+                df["Metrics"] = df["Metrics"].astype(pd.CategoricalDtype(schemas[name]))
+            frames[name] = df
+            continue
+
+        if not fetched:
+            print(f"Fetching and saving data for {stock}...")
+            fetched = True
+
+        frames[name] = extractors[name](ticker_obj)
+        write_csv(frames[name], path)
+
+    if not fetched:
+        print(f"All data for {stock} already exists. Skipping...")
+        return frames
+
+    print(f"Saved data for {stock}\n")
+    return frames
+
+def get_ticker(symbol: str) -> yf.Ticker:
+    if symbol not in _ticker_cache:
+        _ticker_cache[symbol] = yf.Ticker(symbol, session=session)
+    return _ticker_cache[symbol]
+
+# Loaded on first validation rather than at import, and the warning prints only once
+@lru_cache(maxsize=1)
+def load_valid_tickers() -> frozenset[str]:
+    if not VALID_TICKERS_FILE.exists():
+        print(f"Warning: {VALID_TICKERS_FILE} not found, validating every ticker online (run update_tickers.py)")
+        return frozenset()
+    df = pd.read_csv(VALID_TICKERS_FILE, dtype=str, keep_default_na=False)
+    return frozenset(df["symbol"].str.upper())
+
+# Ticker is validated by being in the bundled list, or else by having a regular market price
 def is_valid_ticker(ticker):
+    if ticker.upper() in load_valid_tickers():
+        return True
+
     try:
-        info = yf.Ticker(ticker).info
+        t = get_ticker(ticker)
+        # Goes through the cache, which extract_market then reads from
+        info = fetch_endpoint(t, "info", INFO_TTL)
         return 'regularMarketPrice' in info and info['regularMarketPrice'] is not None
     except:
         return False
@@ -176,49 +278,32 @@ if __name__ == '__main__':
         
         stock_tickers.append(stock)
 
-    # Create Tickers object after validation
-    stock_tickers_obj = yf.Tickers(" ".join(stock_tickers))
-
     # Ensure 'dataset/' folder exists
     Path("dataset").mkdir(exist_ok=True)
 
-    for stock in stock_tickers:
-        ticker_obj = stock_tickers_obj.tickers[stock]
-        
-        # Define file paths
-        files = {
-            "financials": Path(f"dataset/{stock}_financials.csv"),
-            "balance": Path(f"dataset/{stock}_balance_sheet.csv"),
-            "cashflow": Path(f"dataset/{stock}_cashflow.csv"),
-            "market": Path(f"dataset/{stock}_market.csv"),
+    # One worker per ticker, capped so we don't hammer Yahoo
+    max_workers = min(len(stock_tickers), MAX_WORKERS)
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(process_ticker, stock, get_ticker(stock)): stock
+            for stock in stock_tickers
         }
 
-        # If all files exist, skip
-        if all(f.exists() for f in files.values()):
-            print(f"All data for {stock} already exists. Skipping...")
-            continue
-
-        print(f"Fetching and saving data for {stock}...")
-
-        # Extract data
-        fin = extract_financial(ticker_obj)
-        balance = extract_balance(ticker_obj)
-        cashflow = extract_cashflow(ticker_obj)
-        market = extract_market(ticker_obj)
-
-        # Save only missing files
-        if not files["financials"].exists():
-            fin.to_csv(files["financials"], index=False)
+        # A failing ticker shouldn't take down the rest of the batch
+        for future in as_completed(futures):
+            stock = futures[future]
+            try:
+                results[stock] = future.result()
+            except Exception as e:
+                print(f"Failed to process {stock}: {e}")
+
+    # Collect per-ticker frames and combine each statement in a single concat
+    processed = [stock for stock in stock_tickers if stock in results]
+    if processed:
+        for name in ("financials", "balance", "cashflow", "market"):
+            frames = [results[stock][name] for stock in processed]
+            combined = pd.concat(frames, keys=processed, names=["Ticker"])
+            write_csv(combined.reset_index(level="Ticker"), Path(f"dataset/combined_{name}.csv"))
 
-        if not files["balance"].exists():
-            balance.to_csv(files["balance"], index=False)
-
-        if not files["cashflow"].exists():
-            cashflow.to_csv(files["cashflow"], index=False)
-
-        if not files["market"].exists():
-            market.to_csv(files["market"], index=False)
-
-        print(f"Saved data for {stock}\n")
-    
     print('All done!')
\ No newline at end of file
@@ -1,4 +1,7 @@
 import pandas as pd
+import xlsxwriter
+
+from csv_utils import write_csv
 
 # Load Data
 balance_sheet = pd.read_csv("balance_sheet.csv")
@@ -9,35 +12,41 @@ financials = pd.read_csv("financials.csv")
 TICKER = "AAPL"
 COMPANY_NAME = "Apple Inc."
 
-# Function to unpivot and add metadata
-def melt_financial_df(df, source_name):
-    df = df.melt(id_vars=["Metrics"], var_name="Year", value_name="Value")
-    df["Company Ticker"] = TICKER
-    df["Company Name"] = COMPANY_NAME
-    df["Source"] = source_name
-    return df[["Year", "Company Ticker", "Company Name", "Source", "Metrics", "Value"]]
+# Function to turn metrics into columns and add source prefix
+def widen_financial_df(df, source_name):
+    df = df.set_index("Metrics").sort_index().T
+    df.columns = [f"{source_name} {col}" for col in df.columns]
+    return df
 
 # Process each file
-balance_long = melt_financial_df(balance_sheet, "Balance Sheet")
-cashflow_long = melt_financial_df(cashflow, "Cashflow")
-financials_long = melt_financial_df(financials, "Financial Statement")
-
-# Combine all into one structured DataFrame
-combined = pd.concat([balance_long, cashflow_long, financials_long])
-
-# Optional: Pivot to wide format (metrics as columns)
-structured_df = combined.pivot_table(
-    index=["Year", "Company Ticker", "Company Name"],
-    columns=["Source", "Metrics"],
-    values="Value",
-    aggfunc="first"
-).reset_index()
-
-# Optional: Flatten MultiIndex columns
-structured_df.columns = [' '.join(col).strip() if isinstance(col, tuple) else col for col in structured_df.columns]
+balance_wide = widen_financial_df(balance_sheet, "Balance Sheet")
+cashflow_wide = widen_financial_df(cashflow, "Cashflow")
+financials_wide = widen_financial_df(financials, "Financial Statement")
+
+# Combine side by side on Year, dropping years with no data at all
+structured_df = (
+    pd.concat([balance_wide, cashflow_wide, financials_wide], axis=1)
+      .dropna(how="all")
+      .sort_index()
+      .rename_axis("Year")
+      .reset_index()
+)
+
+# Add company metadata after Year
+structured_df.insert(1, "Company Ticker", TICKER)
+structured_df.insert(2, "Company Name", COMPANY_NAME)
 
 # Save as CSV or Excel
-structured_df.to_csv("structured_financials.csv", index=False)
-structured_df.to_excel("structured_financials.xlsx", index=False)
+write_csv(structured_df, "structured_financials.csv")
+
+# Stream rows to the workbook in constant-memory mode. Write row by row,
+# since to_excel writes column by column, which this mode doesn't support
+workbook = xlsxwriter.Workbook("structured_financials.xlsx", {"constant_memory": True})
+worksheet = workbook.add_worksheet()
+worksheet.write_row(0, 0, structured_df.columns)
+rows = structured_df.astype(object).where(structured_df.notna(), None)
+for row_idx, row in enumerate(rows.itertuples(index=False), start=1):
+    worksheet.write_row(row_idx, 0, row)
+workbook.close()
 
 print("✅ Structured file saved as 'structured_financials.csv' and 'structured_financials.xlsx'")
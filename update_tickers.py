@@ -0,0 +1,33 @@
+import pandas as pd
+import pyarrow as pa
+from pyarrow import csv as pacsv
+from pathlib import Path
+
+# Nasdaq Trader symbol directories cover Nasdaq, NYSE and the other US exchanges
+NASDAQ_LISTED_URL = "https://www.nasdaqtrader.com/dynamic/SymDir/nasdaqlisted.txt"
+OTHER_LISTED_URL = "https://www.nasdaqtrader.com/dynamic/SymDir/otherlisted.txt"
+
+OUTPUT_FILE = Path("dataset/valid_tickers.csv")
+
+def load_symbols(url: str, symbol_col: str) -> pd.Series:
+    # keep_default_na=False so real symbols like "NA" aren't read as NaN
+    df = pd.read_csv(url, sep="|", dtype=str, keep_default_na=False)
+
+    # Drops test issues and the trailing "File Creation Time" line
+    df = df[df["Test Issue"] == "N"]
+
+    # Yahoo writes share classes with a dash (BRK-B), the listings use a dot
+    return df[symbol_col].str.replace(".", "-", regex=False)
+
+if __name__ == '__main__':
+    symbols = pd.concat([
+        load_symbols(NASDAQ_LISTED_URL, "Symbol"),
+        load_symbols(OTHER_LISTED_URL, "ACT Symbol"),
+    ])
+    symbols = symbols.drop_duplicates().sort_values()
+
+    Path("dataset").mkdir(exist_ok=True)
+    table = pa.table({"symbol": symbols.to_numpy()})
+    pacsv.write_csv(table, str(OUTPUT_FILE))
+
+    print(f"Saved {len(symbols)} tickers to {OUTPUT_FILE}")